@@ -0,0 +1,111 @@
+import math
+import threading
+
+import pandas as pd
+
+# 세그먼트 키: 데이터 소스/행정동/메뉴/시간대
+SEGMENT_KEYS = ['source', 'order_hname', 'menu_name', 'time_period']
+
+
+# 세그먼트별 배달 시간 통계 (초기에는 누적 평균/분산, 이후 EWMA 평균/분산)
+class SegmentStats:
+    __slots__ = ('count', 'mean', 'var', 'm2', 'last_seconds', 'last_score', 'last_datetime')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.var = 0.0
+        self.m2 = 0.0
+        self.last_seconds = None
+        self.last_score = 0.0
+        self.last_datetime = None
+
+
+# 배달 완료 주문이 들어올 때마다 세그먼트 통계를 O(1)로 갱신하는 이상 탐지기
+class DeliveryAnomalyDetector:
+    def __init__(self, alpha=0.05, threshold=3.0, min_count=20, clip=4.0, max_age=pd.Timedelta(hours=2)):
+        self.alpha = alpha            # EWMA 가중치 (작을수록 과거 반영이 김)
+        self.threshold = threshold    # 이상으로 판단하는 z-score 기준
+        self.min_count = min_count    # 판단을 시작하기 위한 최소 주문 수 (이 수까지는 누적 평균/분산으로 기준선 초기화)
+        self.clip = clip              # 기준선 갱신 시 이상값이 미치는 영향 제한 (표준편차 배수)
+        self.max_age = max_age        # 소스의 최신 배달 완료 시각 기준으로 이 기간 안의 이상만 표시
+        self.segments = {}
+        self.watermarks = {}          # 데이터 소스별로 마지막으로 반영한 배달 완료 시각
+        self._lock = threading.Lock()
+
+    # 주문 하나 반영: 갱신 전 기준선 대비 z-score를 계산한 뒤 기준선 갱신
+    def update(self, key, delivery_seconds, completed_at):
+        stats = self.segments.get(key)
+        if stats is None:
+            stats = self.segments[key] = SegmentStats()
+
+        std = math.sqrt(stats.var)
+        score = (delivery_seconds - stats.mean) / std if std > 0 else 0.0
+
+        if stats.count < self.min_count:
+            # 초기 구간: Welford 방식 누적 평균/표본분산으로 기준선 초기화 (clip 미적용)
+            n = stats.count + 1
+            diff = delivery_seconds - stats.mean
+            stats.mean += diff / n
+            stats.m2 += diff * (delivery_seconds - stats.mean)
+            stats.var = stats.m2 / (n - 1) if n > 1 else 0.0
+        else:
+            # 이상값이 기준선을 끌어올리지 않도록 clip 범위로 잘라서 반영
+            x = delivery_seconds
+            if std > 0:
+                x = min(max(x, stats.mean - self.clip * std), stats.mean + self.clip * std)
+            diff = x - stats.mean
+            incr = self.alpha * diff
+            stats.mean += incr
+            stats.var = (1 - self.alpha) * (stats.var + diff * incr)
+
+        stats.count += 1
+        stats.last_seconds = delivery_seconds
+        stats.last_score = score
+        stats.last_datetime = completed_at
+        return score
+
+    # 원본 이벤트 데이터에서 아직 반영하지 않은 배달 완료 주문만 골라서 반영
+    def ingest(self, df):
+        with self._lock:
+            completed = df[df['event_type'] == '배달 완료']
+            watermark = pd.to_datetime(completed['source'].map(self.watermarks))
+            completed = completed[watermark.isna() | (completed['datetime'] > watermark)]
+            if completed.empty:
+                return 0
+
+            completed = completed.groupby(['source', 'order_id'])['datetime'].min().rename('completed_at')
+            accepted = df[df['event_type'] == '주문 접수']
+            accepted = accepted.set_index(['source', 'order_id'])
+            accepted = accepted[accepted.index.isin(completed.index)]
+            accepted = accepted.sort_values('datetime')
+            accepted = accepted[~accepted.index.duplicated(keep='first')]
+
+            orders = accepted[['order_hname', 'menu_name', 'time_period', 'datetime']].join(completed, how='inner')
+            orders['delivery_seconds'] = (orders['completed_at'] - orders['datetime']).dt.total_seconds()
+            orders = orders[orders['delivery_seconds'] >= 0].reset_index()
+            orders = orders.sort_values('completed_at')
+
+            for row in orders[SEGMENT_KEYS + ['delivery_seconds', 'completed_at']].itertuples(index=False):
+                self.update(tuple(row[:4]), row.delivery_seconds, row.completed_at)
+
+            # 배달 완료 기록이 있지만 접수 기록이 없는 주문도 다시 보지 않도록 워터마크 갱신
+            self.watermarks.update(completed.groupby(level='source').max().to_dict())
+            return len(orders)
+
+    # 최근 주문이 기준선보다 threshold 이상 느린 세그먼트 목록
+    # 주문이 끊긴 세그먼트가 계속 표시되지 않도록 max_age 이내의 이상만 포함
+    def anomalies(self):
+        with self._lock:
+            rows = [
+                (*key, stats.last_datetime, stats.last_seconds / 60, stats.mean / 60,
+                 math.sqrt(stats.var) / 60, stats.last_score, stats.count)
+                for key, stats in self.segments.items()
+                if stats.count >= self.min_count and stats.last_score >= self.threshold
+                and stats.last_datetime >= self.watermarks[key[0]] - self.max_age
+            ]
+        result = pd.DataFrame(rows, columns=SEGMENT_KEYS + [
+            'last_datetime', 'last_delivery_minutes', 'baseline_minutes',
+            'baseline_std_minutes', 'z_score', 'order_count'
+        ])
+        return result.sort_values('z_score', ascending=False).reset_index(drop=True)
@@ -0,0 +1,256 @@
+import functools
+import hashlib
+import heapq
+import os
+import pickle
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+# 캐시 메모리 한도 (MB, 환경 변수로 변경 가능)
+DEFAULT_MAX_MB = 256
+
+_MISSING = object()
+
+
+# 캐시 항목이 차지하는 메모리(바이트) 추정
+def estimate_size(value):
+    if value is None:
+        return 0
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, (pd.Series, pd.Index)):
+        return int(value.memory_usage(deep=True))
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k) + estimate_size(v) for k, v in value.items()
+        )
+    # 그 밖의 객체(plotly Figure 등)는 직렬화 크기로 추정
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+# 캐시 키 생성에 사용할 인자 해시 (데이터프레임은 내용 기준)
+def _hash_arg(value, hasher):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        labels = value.columns if isinstance(value, pd.DataFrame) else value.name
+        hasher.update(repr(labels).encode())
+        hasher.update(pd.util.hash_pandas_object(value, index=True).values.tobytes())
+    elif isinstance(value, (list, tuple)):
+        hasher.update(f'{type(value).__name__}{len(value)}'.encode())
+        for item in value:
+            _hash_arg(item, hasher)
+    elif isinstance(value, dict):
+        hasher.update(f'dict{len(value)}'.encode())
+        for k in sorted(value, key=repr):
+            _hash_arg(k, hasher)
+            _hash_arg(value[k], hasher)
+    else:
+        hasher.update(repr(value).encode())
+
+
+def make_key(func, args, kwargs):
+    hasher = hashlib.sha1()
+    # 대시보드 스크립트는 모두 __main__으로 실행되므로 파일 경로까지 포함
+    hasher.update(f'{func.__code__.co_filename}:{func.__qualname__}'.encode())
+    _hash_arg(args, hasher)
+    _hash_arg(kwargs, hasher)
+    return hasher.hexdigest()
+
+
+class _Entry:
+    __slots__ = ('value', 'size', 'cost', 'expires_at', 'priority', 'seq')
+
+
+# 메모리 한도를 지키는 캐시 (GreedyDual-Size 방식의 비용 기반 LRU)
+# 우선순위 = 기준값 + 계산 비용(초) / 크기(바이트)
+# 오래 쓰이지 않았거나, 크기에 비해 다시 계산하기 쉬운 항목부터 제거
+class CacheManager:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.total_bytes = 0
+        self._entries = {}
+        self._heap = []
+        self._clock = 0.0
+        self._seq = 0
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _touch(self, key, entry):
+        self._seq += 1
+        entry.priority = self._clock + entry.cost / max(entry.size, 1)
+        entry.seq = self._seq
+        heapq.heappush(self._heap, (entry.priority, entry.seq, key))
+        self._compact_heap()
+
+    # 적중할 때마다 힙에 쌓이는 오래된 기록 정리 (힙 크기를 항목 수에 비례하도록 유지)
+    def _compact_heap(self):
+        if len(self._heap) > 4 * len(self._entries) + 64:
+            self._heap = [(e.priority, e.seq, k) for k, e in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self.total_bytes -= entry.size
+
+    # 만료된 항목을 모두 제거 (메모리 한도 계산에서 제외)
+    def _purge_expired(self):
+        now = time.monotonic()
+        expired = [
+            key for key, entry in self._entries.items()
+            if entry.expires_at is not None and entry.expires_at <= now
+        ]
+        for key in expired:
+            self._remove(key)
+
+    # 우선순위가 가장 낮은 항목 제거 (힙에 남은 오래된 기록은 건너뜀)
+    def _evict_one(self):
+        while self._heap:
+            priority, seq, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry is None or entry.seq != seq:
+                continue
+            self._clock = priority
+            self._remove(key)
+            self.evictions += 1
+            return True
+        return False
+
+    # 만료되지 않은 항목이면 적중으로 기록하고 값 반환 (self._lock 안에서 호출)
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at is not None and entry.expires_at <= time.monotonic():
+            self._remove(key)
+            entry = None
+        if entry is None:
+            return _MISSING
+        self.hits += 1
+        self._touch(key, entry)
+        return entry.value
+
+    def get(self, key):
+        with self._lock:
+            value = self._lookup(key)
+            if value is _MISSING:
+                self.misses += 1
+            return value
+
+    # 키별 잠금: 같은 키를 동시에 계산하지 않도록 사용하는 세션이 있는 동안만 유지
+    @contextmanager
+    def _key_lock(self, key):
+        with self._lock:
+            item = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            item[1] += 1
+        try:
+            with item[0]:
+                yield
+        finally:
+            with self._lock:
+                item[1] -= 1
+                if item[1] == 0:
+                    del self._key_locks[key]
+
+    # 캐시에 없으면 계산해서 저장
+    # 여러 세션이 같은 키를 동시에 요청하면 한 세션만 계산하고 나머지는 그 결과를 사용
+    def get_or_compute(self, key, compute, ttl=None):
+        with self._lock:
+            value = self._lookup(key)
+        if value is not _MISSING:
+            return value
+
+        with self._key_lock(key):
+            with self._lock:
+                value = self._lookup(key)
+                if value is not _MISSING:
+                    return value
+                self.misses += 1
+            start = time.perf_counter()
+            value = compute()
+            if value is not None:
+                self.put(key, value, cost=time.perf_counter() - start, ttl=ttl)
+            return value
+
+    def put(self, key, value, cost=0.0, ttl=None):
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            # 한도보다 큰 항목은 캐시하지 않음
+            if size > self.max_bytes:
+                return False
+            # 만료된 항목을 먼저 정리한 뒤에도 부족하면 우선순위가 낮은 항목부터 제거
+            if self.total_bytes + size > self.max_bytes:
+                self._purge_expired()
+            while self.total_bytes + size > self.max_bytes and self._evict_one():
+                pass
+            entry = _Entry()
+            entry.value = value
+            entry.size = size
+            entry.cost = cost
+            entry.expires_at = time.monotonic() + ttl if ttl is not None else None
+            self._entries[key] = entry
+            self.total_bytes += size
+            self._touch(key, entry)
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._heap.clear()
+            self.total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.total_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+# 프로세스 전체에서 공유하는 캐시 (모든 세션/대시보드 공통)
+cache_manager = CacheManager(
+    int(float(os.environ.get('DASHBOARD_CACHE_MAX_MB', DEFAULT_MAX_MB)) * 1024 * 1024)
+)
+
+
+# 함수 결과 캐시 데코레이터 (st.cache_data 대신 사용)
+# 반환값은 복사하지 않고 그대로 공유되므로 호출한 쪽에서 수정하지 말 것
+# None(불러오기 실패)과 예외는 캐시하지 않고 다음 호출 때 다시 계산
+# st.cache_data와 달리 함수 안의 st.warning 등은 다른 세션에 다시 표시되지 않으므로
+# 표시할 메시지는 반환값에 담아 호출한 쪽에서 출력할 것
+def cached(ttl=None, manager=None):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            cache = manager or cache_manager
+            key = make_key(func, args, kwargs)
+            return cache.get_or_compute(key, lambda: func(*args, **kwargs), ttl=ttl)
+        return wrapper
+    return decorator
+
+
+# 사이드바에 캐시 상태 표시
+def show_cache_stats():
+    cache_stats = cache_manager.stats()
+    st.sidebar.caption(
+        f"캐시: {cache_stats['bytes'] / 1024 / 1024:.1f}MB / {cache_stats['max_bytes'] / 1024 / 1024:.0f}MB, "
+        f"항목 {cache_stats['entries']}개, 적중 {cache_stats['hits']} / 실패 {cache_stats['misses']} / 제거 {cache_stats['evictions']}"
+    )
@@ -1,13 +1,12 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import os
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
-from google.oauth2 import service_account
 import numpy as np
+from sheets_loader import get_google_sheets_data, get_time_period, show_load_errors
+from anomaly_detector import DeliveryAnomalyDetector
+from pivot_pager import TOTAL_COLUMN, build_sparse_pivot, get_pivot_page
+from cache_manager import cached, show_cache_stats
 
 # 분:초 형식으로 변환하는 함수
 def format_minutes_seconds(minutes):
@@ -16,51 +15,6 @@ def format_minutes_seconds(minutes):
     secs = total_seconds % 60
     return f"{mins}분 {secs}초"
 
-# Google Sheets API 설정
-def get_google_sheets_data():
-    # 접근 권한 범위
-    SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
-    
-    # Streamlit Secrets에서 서비스 계정 정보 가져오기
-    creds = service_account.Credentials.from_service_account_info(
-        st.secrets["gcp_service_account"],
-        scopes=SCOPES
-    )
-    
-    # Sheets API 클라이언트 생성
-    service = build('sheets', 'v4', credentials=creds)
-    
-    # 스프레드시트 ID와 범위 지정
-    SPREADSHEET_ID = '18r37Qff2igl38HkUEVefFtmT1iOpJ-jIg5aQ91wIUII'
-    RANGE_NAME = 'event_raw!A1:Z30000'  # 데이터 범위를 늘림
-    
-    # 데이터 읽기
-    result = service.spreadsheets().values().get(
-        spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME).execute()
-    values = result.get('values', [])
-    
-    if not values:
-        st.error('데이터를 찾을 수 없습니다.')
-        return None
-    
-    # 데이터프레임 생성
-    df = pd.DataFrame(values[1:], columns=values[0])
-
-    # datetime 컬럼이 있다면 time_period 컬럼 추가
-    if 'datetime' in df.columns:
-        df['datetime'] = pd.to_datetime(df['datetime'])
-        def get_time_period(hour):
-            if 10 <= hour < 15:
-                return 'lunch'
-            elif 17 <= hour < 22:
-                return 'dinner'
-            else:
-                return 'other'
-        df['time_period'] = df['datetime'].dt.hour.apply(get_time_period)
-        df = df[df['time_period'] != 'other']
-
-    return df
-
 # 페이지 설정
 st.set_page_config(page_title="배달 통계 대시보드", layout="wide")
 
@@ -81,81 +35,89 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
+# 원본 이벤트 데이터와 소스별 오류 메시지 (5분마다 캐시 갱신)
+@cached(ttl=300)
+def load_raw_data():
+    return get_google_sheets_data()
+
+# 배달 시간 이상 탐지기 (세션 간 공유, 새로 들어온 배달 완료 주문만 반영)
+@st.cache_resource
+def get_anomaly_detector():
+    return DeliveryAnomalyDetector()
+
+# 희소 피벗 계산 (필터 조건이 같으면 재사용)
+@cached(ttl=300)
+def load_sparse_pivot(df, index, columns):
+    return build_sparse_pivot(df, index, columns)
+
 # 데이터 처리 함수
-@st.cache_data(ttl=300)  # 5분마다 캐시 갱신
+@cached(ttl=300)  # 5분마다 캐시 갱신
 def load_data():
-    try:
-        df = get_google_sheets_data()
-        if df is None:
-            return None
-            
-        # 필요한 컬럼만 사용
-        df = df[['datetime', 'order_id', 'event_type', 'datetime_simple']]
-        df['datetime'] = pd.to_datetime(df['datetime'])
-        
-        # 시간대 구분
-        def get_time_period(hour):
-            if 10 <= hour < 15:
-                return 'lunch'
-            elif 17 <= hour < 22:
-                return 'dinner'
-            else:
-                return 'other'
-        
-        df['time_period'] = df['datetime'].dt.hour.apply(get_time_period)
-        df = df[df['time_period'] != 'other']
-        
-        # 주문별 통계 계산
-        order_group = df[df['event_type'].isin(['주문 접수', '배달 완료'])].pivot_table(
-            index=['order_id', 'datetime_simple', 'time_period'],
-            columns='event_type',
-            values='datetime',
-            aggfunc='min'
-        ).reset_index()
-        
-        order_group['delivery_seconds'] = (
-            order_group['배달 완료'] - order_group['주문 접수']
-        ).dt.total_seconds()
-        
-        # 10분 이내, 30분 이상 주문 필터링
-        order_10min = order_group[order_group['delivery_seconds'] <= 600]
-        order_30min = order_group[order_group['delivery_seconds'] >= 1800]
-        
-        # 통계 계산
-        # total_orders는 '주문 접수' 이벤트만 카운트
-        total_orders_df = df[df['event_type'] == '주문 접수'].groupby(['datetime_simple', 'time_period'])['order_id'].count().reset_index(name='total_orders')
-        fast_count = order_10min.groupby(['datetime_simple', 'time_period'])['order_id'].count().reset_index(name='under_10min_orders')
-        slow_count = order_30min.groupby(['datetime_simple', 'time_period'])['order_id'].count().reset_index(name='over_30min_orders')
-        
-        time_stats = order_group.groupby(['datetime_simple', 'time_period'])['delivery_seconds'].agg(['mean', 'min', 'max']).reset_index()
-        time_stats['avg_delivery_minutes'] = (time_stats['mean'] / 60).round(2)
-        time_stats['min_delivery_minutes'] = (time_stats['min'] / 60).round(2)
-        time_stats['max_delivery_minutes'] = (time_stats['max'] / 60).round(2)
-        
-        # 결과 병합
-        result = pd.merge(total_orders_df, fast_count, on=['datetime_simple', 'time_period'], how='left')
-        result = pd.merge(result, slow_count, on=['datetime_simple', 'time_period'], how='left')
-        result = pd.merge(result, time_stats[['datetime_simple', 'time_period', 'avg_delivery_minutes', 'min_delivery_minutes', 'max_delivery_minutes']], 
-                         on=['datetime_simple', 'time_period'], how='left')
-        
-        result = result.fillna(0)
-        result['under_10min_orders'] = result['under_10min_orders'].astype(int)
-        result['over_30min_orders'] = result['over_30min_orders'].astype(int)
-        result['under_10min_ratio'] = (result['under_10min_orders'] / result['total_orders'] * 100).round(2)
-        result['over_30min_ratio'] = (result['over_30min_orders'] / result['total_orders'] * 100).round(2)
-        
-        # 날짜 순서대로 정렬
-        result['date'] = pd.to_datetime(result['datetime_simple'])
-        result = result.sort_values('date')
-        result = result.drop('date', axis=1)
-        
-        return result
-    except Exception as e:
-        st.error(f"데이터를 불러오는 중 오류가 발생했습니다: {str(e)}")
-        return None
-
-# 데이터 로드
-data = load_data()
+    df, _ = load_raw_data()
+
+    # 필요한 컬럼만 사용
+    df = df[['datetime', 'order_id', 'event_type', 'datetime_simple', 'source']]
+    df['datetime'] = pd.to_datetime(df['datetime'])
+    
+    # 시간대 구분
+    df['time_period'] = df['datetime'].dt.hour.apply(get_time_period)
+    df = df[df['time_period'] != 'other']
+    
+    # 주문별 통계 계산
+    order_group = df[df['event_type'].isin(['주문 접수', '배달 완료'])].pivot_table(
+        index=['source', 'order_id', 'datetime_simple', 'time_period'],
+        columns='event_type',
+        values='datetime',
+        aggfunc='min'
+    ).reset_index()
+    
+    order_group['delivery_seconds'] = (
+        order_group['배달 완료'] - order_group['주문 접수']
+    ).dt.total_seconds()
+    
+    # 10분 이내, 30분 이상 주문 필터링
+    order_10min = order_group[order_group['delivery_seconds'] <= 600]
+    order_30min = order_group[order_group['delivery_seconds'] >= 1800]
+    
+    # 통계 계산 (데이터 소스별로 분리)
+    GROUP_KEYS = ['source', 'datetime_simple', 'time_period']
+    # total_orders는 '주문 접수' 이벤트만 카운트
+    total_orders_df = df[df['event_type'] == '주문 접수'].groupby(GROUP_KEYS)['order_id'].count().reset_index(name='total_orders')
+    fast_count = order_10min.groupby(GROUP_KEYS)['order_id'].count().reset_index(name='under_10min_orders')
+    slow_count = order_30min.groupby(GROUP_KEYS)['order_id'].count().reset_index(name='over_30min_orders')
+    
+    time_stats = order_group.groupby(GROUP_KEYS)['delivery_seconds'].agg(['mean', 'min', 'max']).reset_index()
+    time_stats['avg_delivery_minutes'] = (time_stats['mean'] / 60).round(2)
+    time_stats['min_delivery_minutes'] = (time_stats['min'] / 60).round(2)
+    time_stats['max_delivery_minutes'] = (time_stats['max'] / 60).round(2)
+    
+    # 결과 병합
+    result = pd.merge(total_orders_df, fast_count, on=GROUP_KEYS, how='left')
+    result = pd.merge(result, slow_count, on=GROUP_KEYS, how='left')
+    result = pd.merge(result, time_stats[GROUP_KEYS + ['avg_delivery_minutes', 'min_delivery_minutes', 'max_delivery_minutes']], 
+                     on=GROUP_KEYS, how='left')
+    
+    result = result.fillna(0)
+    result['under_10min_orders'] = result['under_10min_orders'].astype(int)
+    result['over_30min_orders'] = result['over_30min_orders'].astype(int)
+    result['under_10min_ratio'] = (result['under_10min_orders'] / result['total_orders'] * 100).round(2)
+    result['over_30min_ratio'] = (result['over_30min_orders'] / result['total_orders'] * 100).round(2)
+    
+    # 날짜 순서대로 정렬
+    result['date'] = pd.to_datetime(result['datetime_simple'])
+    result = result.sort_values('date')
+    result = result.drop('date', axis=1)
+    
+    return result
+
+# 데이터 로드 (캐시된 결과를 받은 세션에서도 경고가 보이도록 호출한 쪽에서 표시)
+try:
+    raw_df, load_errors = load_raw_data()
+    data = load_data()
+except Exception as e:
+    st.error(f"데이터를 불러오는 중 오류가 발생했습니다: {str(e)}")
+    raw_df, load_errors, data = None, [], None
+show_load_errors(load_errors)
 
 if data is not None:
     # 대시보드 제목
@@ -169,8 +131,34 @@ if data is not None:
         default=data['time_period'].unique()
     )
 
+    source = st.sidebar.multiselect(
+        "데이터 소스 선택",
+        options=data['source'].unique(),
+        default=data['source'].unique()
+    )
+
+    # 배달 시간 이상 세그먼트 (행정동/메뉴/시간대, 사이드바에서 선택한 데이터 소스만 표시)
+    if 'order_hname' in raw_df.columns and 'menu_name' in raw_df.columns:
+        detector = get_anomaly_detector()
+        detector.ingest(raw_df)
+        anomalies = detector.anomalies()
+        anomalies = anomalies[anomalies['source'].isin(source)].copy()
+        if not anomalies.empty:
+            st.warning(f"배달 시간 이상 감지: {len(anomalies)}개 행정동/메뉴/시간대에서 최근 배달이 평소보다 느립니다.")
+            anomalies['최근 배달 시간'] = anomalies['last_delivery_minutes'].apply(format_minutes_seconds)
+            anomalies['평소 배달 시간'] = anomalies['baseline_minutes'].apply(format_minutes_seconds)
+            anomalies['z_score'] = anomalies['z_score'].round(2)
+            st.dataframe(
+                anomalies[['source', 'order_hname', 'menu_name', 'time_period', 'last_datetime',
+                           '최근 배달 시간', '평소 배달 시간', 'z_score', 'order_count']],
+                use_container_width=True
+            )
+
+    # 캐시 상태
+    show_cache_stats()
+
     # 필터링된 데이터
-    filtered_data = data[data['time_period'].isin(time_period)]
+    filtered_data = data[data['time_period'].isin(time_period) & data['source'].isin(source)]
 
     # 메트릭 카드
     col1, col2, col3, col4 = st.columns(4)
@@ -201,6 +189,10 @@ if data is not None:
         )
 
     # 그래프
+    # plotly는 그래프를 그리는 시점에 import (첫 화면 표시 속도 개선)
+    import plotly.express as px
+    import plotly.graph_objects as go
+
     st.subheader("시간대별 배달 통계")
 
     # 1. 배달 시간 추이
@@ -219,9 +211,10 @@ if data is not None:
         x='datetime_simple',
         y='avg_delivery_minutes',
         color='time_period',
+        line_dash='source',
         title='시간대별 평균 배달 시간 추이',
-        labels={'datetime_simple': '날짜', 'avg_delivery_minutes': '평균 배달 시간', 'time_period': '시간대'},
-        custom_data=['avg_delivery_time']
+        labels={'datetime_simple': '날짜', 'avg_delivery_minutes': '평균 배달 시간', 'time_period': '시간대', 'source': '데이터 소스'},
+        custom_data=['avg_delivery_time', 'source', 'time_period']
     )
     
     fig_time.update_xaxes(
@@ -233,7 +226,8 @@ if data is not None:
     fig_time.update_traces(
         hovertemplate="<br>".join([
             "날짜: %{x}",
-            "시간대: %{fullData.name}",
+            "시간대: %{customdata[2]}",
+            "데이터 소스: %{customdata[1]}",
             "평균 배달 시간: %{customdata[0]}"
         ])
     )
@@ -249,8 +243,9 @@ if data is not None:
             x='datetime_simple',
             y='under_10min_ratio',
             color='time_period',
+            pattern_shape='source',
             title='10분 이내 배달 비율',
-            labels={'datetime_simple': '날짜', 'under_10min_ratio': '비율(%)', 'time_period': '시간대'}
+            labels={'datetime_simple': '날짜', 'under_10min_ratio': '비율(%)', 'time_period': '시간대', 'source': '데이터 소스'}
         )
         st.plotly_chart(fig_10min, use_container_width=True)
 
@@ -260,8 +255,9 @@ if data is not None:
             x='datetime_simple',
             y='over_30min_ratio',
             color='time_period',
+            pattern_shape='source',
             title='30분 이상 배달 비율',
-            labels={'datetime_simple': '날짜', 'over_30min_ratio': '비율(%)', 'time_period': '시간대'}
+            labels={'datetime_simple': '날짜', 'over_30min_ratio': '비율(%)', 'time_period': '시간대', 'source': '데이터 소스'}
         )
         st.plotly_chart(fig_30min, use_container_width=True)
 
@@ -282,10 +278,10 @@ if data is not None:
     st.subheader("행정동/메뉴별 주문 접수 현황")
 
     # 원본 데이터프레임 가져오기
-    df = get_google_sheets_data()
+    df = raw_df
 
     if 'order_hname' in df.columns and 'menu_name' in df.columns:
-        menu_df = df[df['event_type'] == '주문 접수'][['order_hname', 'menu_name', 'datetime_simple', 'time_period']]
+        menu_df = df[(df['event_type'] == '주문 접수') & (df['source'].isin(source))][['source', 'order_hname', 'menu_name', 'datetime_simple', 'time_period']]
         menu_df['datetime_simple'] = pd.to_datetime(menu_df['datetime_simple'])
 
         # 날짜 범위 설정
@@ -390,14 +386,48 @@ if data is not None:
                 st.plotly_chart(fig, use_container_width=True)
 
         # 피벗 테이블: 행정동/날짜/시간대별 메뉴 주문 건수
-        pivot_menu = pd.pivot_table(
-            filtered_menu_df,
-            index=['order_hname', 'datetime_simple', 'time_period'],
-            columns='menu_name',
-            aggfunc='size',
-            fill_value=0
-        ).reset_index()
-
-        st.dataframe(pivot_menu, use_container_width=True)
+        pivot_index = ['source', 'order_hname', 'datetime_simple', 'time_period']
+        table_mode = st.radio("표 보기 방식", ["페이지 단위", "전체"], horizontal=True)
+
+        if filtered_menu_df.empty:
+            st.info("선택한 조건에 해당하는 주문이 없습니다.")
+        elif table_mode == "전체":
+            pivot_menu = pd.pivot_table(
+                filtered_menu_df,
+                index=pivot_index,
+                columns='menu_name',
+                aggfunc='size',
+                fill_value=0
+            ).reset_index()
+
+            st.dataframe(pivot_menu, use_container_width=True)
+        else:
+            # 서버에서 희소 형태로 집계/정렬하고 현재 페이지만 전송
+            counts, row_totals, column_totals = load_sparse_pivot(filtered_menu_df, pivot_index, 'menu_name')
+
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                sort_by = st.selectbox("정렬 기준", [TOTAL_COLUMN] + pivot_index + column_totals.index.tolist())
+            with col2:
+                ascending = st.checkbox("오름차순", value=False)
+            with col3:
+                page_size = st.selectbox("페이지당 행 수", [50, 100, 200], index=1)
+            total_pages = max(1, -(-len(row_totals) // page_size))
+            with col4:
+                page = st.number_input("페이지", min_value=1, max_value=total_pages, value=1, step=1)
+
+            pivot_page = get_pivot_page(
+                counts, row_totals, column_totals,
+                sort_by=sort_by, ascending=ascending, page=int(page), page_size=page_size
+            )
+            start_row = (int(page) - 1) * page_size
+            st.caption(f"전체 {len(row_totals):,}행 중 {start_row + 1:,}-{start_row + len(pivot_page):,}행 ({int(page)}/{total_pages} 페이지)")
+            st.dataframe(pivot_page, use_container_width=True, hide_index=True)
+
+            # 메뉴별 합계
+            totals = column_totals.to_frame().T
+            totals[TOTAL_COLUMN] = column_totals.sum()
+            totals.index = [TOTAL_COLUMN]
+            st.dataframe(totals, use_container_width=True)
     else:
         st.info("order_hname 또는 menu_name 컬럼이 데이터에 없습니다.") 
\ No newline at end of file
@@ -0,0 +1,93 @@
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+# 대시보드 첫 화면(콜드 스타트)에 필요한 import 시간 측정
+## python measure_startup.py
+## python measure_startup.py --max-seconds 1.5   (기준 초과 시 종료 코드 1)
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+DASHBOARDS = ['dashboard.py', 'predict_dashboard.py']
+
+
+# 첫 화면을 그릴 때 실행되는 import 문 추출
+# 모듈 최상단뿐 아니라 if 블록/함수 안에서 지연 import하는 문장도 포함하고,
+# 같은 폴더의 로컬 모듈(sheets_loader 등)은 그 안의 import 문까지 따라가서 수집
+def get_render_imports(path, seen=None):
+    if seen is None:
+        seen = set()
+    seen.add(os.path.abspath(path))
+
+    with open(path, encoding='utf-8') as f:
+        tree = ast.parse(f.read())
+
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module != '__future__':
+            names = [node.module]
+        else:
+            continue
+        imports.append(ast.unparse(node))
+        for name in names:
+            local_path = os.path.join(current_dir, name.split('.')[0] + '.py')
+            if os.path.exists(local_path) and os.path.abspath(local_path) not in seen:
+                imports.extend(get_render_imports(local_path, seen))
+
+    return list(dict.fromkeys(imports))
+
+
+# 새 파이썬 프로세스에서 import 시간 측정 (-X importtime 결과 파싱)
+def measure_imports(imports):
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', '\n'.join(imports)],
+        cwd=current_dir,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    # 형식: "import time: self [us] | cumulative | imported package"
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # 모듈 이름 앞의 들여쓰기가 import 깊이를 나타내므로 이름은 strip하지 않음
+        parts = line[len('import time:'):].split('|')
+        self_us, cumulative_us, name = int(parts[0]), int(parts[1]), parts[2][1:].rstrip()
+        modules.append((name, self_us, cumulative_us))
+
+    # 최상위 모듈(들여쓰기 없음)의 누적 시간 합계가 전체 import 시간
+    top_level = [m for m in modules if not m[0].startswith(' ')]
+    total_seconds = sum(m[2] for m in top_level) / 1_000_000
+    slowest = sorted(top_level, key=lambda m: m[2], reverse=True)[:5]
+    return total_seconds, slowest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='대시보드 시작 import 시간 측정')
+    parser.add_argument('--max-seconds', type=float, default=None,
+                        help='대시보드별 허용 import 시간(초). 초과 시 종료 코드 1')
+    args = parser.parse_args()
+
+    over_budget = False
+    for dashboard in DASHBOARDS:
+        imports = get_render_imports(os.path.join(current_dir, dashboard))
+        total_seconds, slowest = measure_imports(imports)
+        print(f"{dashboard}: {total_seconds:.3f}초")
+        for name, _, cumulative_us in slowest:
+            print(f"    {name.strip():<30} {cumulative_us / 1000:8.1f}ms")
+        if args.max_seconds is not None and total_seconds > args.max_seconds:
+            print(f"    기준({args.max_seconds:.3f}초) 초과")
+            over_budget = True
+
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+import pandas as pd
+
+TOTAL_COLUMN = '합계'
+
+
+# 희소 형태의 피벗: 0이 아닌 (행, 열) 조합의 건수만 보관
+def build_sparse_pivot(df, index, columns):
+    counts = df.groupby(index + [columns], observed=True).size()
+    counts = counts[counts > 0]
+    row_totals = counts.groupby(level=index, observed=True).sum().rename(TOTAL_COLUMN)
+    column_totals = counts.groupby(level=columns, observed=True).sum().sort_index()
+    return counts, row_totals, column_totals
+
+
+# 정렬 기준 값 (행 키, 합계 또는 특정 열의 건수)
+def _sort_values(counts, row_totals, sort_by):
+    if sort_by == TOTAL_COLUMN:
+        return row_totals
+    if sort_by in row_totals.index.names:
+        return row_totals.index.get_level_values(sort_by).to_series(index=row_totals.index)
+    column_level = counts.index.names[-1]
+    values = counts.xs(sort_by, level=column_level)
+    return values.reindex(row_totals.index, fill_value=0)
+
+
+# 정렬 후 한 페이지 분량의 행만 밀집 형태로 변환
+def get_pivot_page(counts, row_totals, column_totals, sort_by=TOTAL_COLUMN, ascending=False,
+                   page=1, page_size=100):
+    order = _sort_values(counts, row_totals, sort_by).sort_values(ascending=ascending, kind='stable')
+    start = (page - 1) * page_size
+    page_rows = order.index[start:start + page_size]
+
+    # 현재 페이지에 해당하는 셀만 펼침
+    column_level = counts.index.names[-1]
+    row_levels = list(row_totals.index.names)
+    page_counts = counts[counts.index.droplevel(column_level).isin(page_rows)]
+    page_df = page_counts.unstack(column_level, fill_value=0)
+    page_df = page_df.reindex(index=page_rows, columns=column_totals.index, fill_value=0)
+    page_df[TOTAL_COLUMN] = row_totals.reindex(page_rows).values
+    page_df.columns.name = None
+    return page_df.reset_index(names=row_levels)
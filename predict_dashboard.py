@@ -1,54 +1,66 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.linear_model import LinearRegression
-import plotly.graph_objects as go
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-
-# 데이터 불러오기 함수 (기존 get_google_sheets_data 재활용)
-def get_google_sheets_data():
-    SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
-    creds = service_account.Credentials.from_service_account_info(
-        st.secrets["gcp_service_account"],
-        scopes=SCOPES
-    )
-    service = build('sheets', 'v4', credentials=creds)
-    SPREADSHEET_ID = '18r37Qff2igl38HkUEVefFtmT1iOpJ-jIg5aQ91wIUII'
-    RANGE_NAME = 'event_raw!A1:Z30000'
-    result = service.spreadsheets().values().get(
-        spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME).execute()
-    values = result.get('values', [])
-    if not values:
-        st.error('데이터를 찾을 수 없습니다.')
-        return None
-    df = pd.DataFrame(values[1:], columns=values[0])
-    # datetime 컬럼이 있다면 time_period 컬럼 추가
-    if 'datetime' in df.columns:
-        df['datetime'] = pd.to_datetime(df['datetime'])
-        def get_time_period(hour):
-            if 10 <= hour < 15:
-                return 'lunch'
-            elif 17 <= hour < 22:
-                return 'dinner'
-            else:
-                return 'other'
-        df['time_period'] = df['datetime'].dt.hour.apply(get_time_period)
-        df = df[df['time_period'] != 'other']
-    return df
+from sheets_loader import get_google_sheets_data, show_load_errors
+from cache_manager import cached, show_cache_stats
+
+# 데이터 불러오기 (5분마다 캐시 갱신, 캐시된 데이터프레임은 수정하지 않음)
+# 소스별 오류 메시지도 함께 캐시해서 모든 세션에 경고 표시
+@cached(ttl=300)
+def load_data():
+    df, errors = get_google_sheets_data()
+    df['datetime_simple'] = pd.to_datetime(df['datetime_simple'])
+    df['weekday_type'] = df['datetime_simple'].dt.weekday.apply(lambda x: '주말' if x >= 5 else '평일')
+    return df, errors
+
+# 이동평균 회귀 학습 및 다음날 예측 (같은 입력이면 캐시 재사용)
+@cached(ttl=300)
+def fit_forecast(sub):
+    # sklearn은 예측 구간에서만 import (첫 화면 표시 속도 개선)
+    from sklearn.linear_model import LinearRegression
+
+    # 주문수가 0인 row 제거
+    sub = sub[sub['order_count'] > 0].copy()
+
+    # 이동평균 계산
+    sub['ma3'] = sub['order_count'].rolling(window=3, min_periods=1).mean().shift(1)
+    sub['ma7'] = sub['order_count'].rolling(window=7, min_periods=1).mean().shift(1)
+    sub = sub.dropna(subset=['ma3', 'ma7'])
+
+    # 모델 학습
+    X = sub[['ma3', 'ma7']].values
+    y = sub['order_count'].values
+    model = LinearRegression().fit(X, y)
+    y_pred = model.predict(X)
+    r2 = model.score(X, y)
+
+    # 다음날 예측 (전날까지의 평균, 0 제외)
+    if len(sub) > 3:
+        ma3 = sub['order_count'].iloc[-3:].mean()
+    else:
+        ma3 = sub['order_count'].mean()
+    if len(sub) > 7:
+        ma7 = sub['order_count'].iloc[-7:].mean()
+    else:
+        ma7 = sub['order_count'].mean()
+    next_pred = model.predict(np.array([[ma3, ma7]]))[0]
+    return sub, y, y_pred, r2, model.coef_, model.intercept_, next_pred
 
 st.set_page_config(page_title="주문수 예측 대시보드", layout="wide")
 st.title("주문수 예측: 이동평균 기반 선형회귀")
 
-df = get_google_sheets_data()
-if df is None:
-    st.error("구글 시트에서 데이터를 불러오지 못했습니다.")
+try:
+    df, load_errors = load_data()
+except Exception as e:
+    st.error(f"구글 시트에서 데이터를 불러오지 못했습니다: {str(e)}")
     st.stop()
+show_load_errors(load_errors)
 
-df['datetime_simple'] = pd.to_datetime(df['datetime_simple'])
-df['weekday_type'] = df['datetime_simple'].dt.weekday.apply(lambda x: '주말' if x >= 5 else '평일')
+# 캐시 상태
+show_cache_stats()
 
 # 필터 UI
+source_options = df['source'].unique().tolist()
 hname_options = df['order_hname'].unique().tolist()
 menu_options = df['menu_name'].unique().tolist()
 time_options = df['time_period'].unique().tolist()
@@ -66,6 +78,7 @@ with col3:
 with col4:
     selected_weekday = st.multiselect("요일구분", weekday_options, default=['전체'])
 
+selected_source = st.multiselect("데이터 소스", source_options, default=source_options)
 start_date, end_date = st.date_input("날짜 범위", value=(min_date, max_date), min_value=min_date, max_value=max_date)
 
 # 평일/주말 필터 적용
@@ -75,6 +88,7 @@ else:
     weekday_mask = df['weekday_type'].isin(selected_weekday)
 
 filtered = df[
+    (df['source'].isin(selected_source)) &
     (df['order_hname'].isin(selected_hname)) &
     (df['menu_name'].isin(selected_menu)) &
     (df['time_period'].isin(selected_time)) &
@@ -91,6 +105,9 @@ agg = (
     .reset_index(name='order_count')
 )
 
+# plotly는 그래프 구간에서만 import (첫 화면 표시 속도 개선)
+import plotly.graph_objects as go
+
 # --- 모든 동+모든 메뉴 합산 (최상단에 배치) ---
 st.markdown("### [모든 동+메뉴 합산] 전체 주문수 예측 (이동평균 회귀)")
 for tp in selected_time:
@@ -99,28 +116,7 @@ for tp in selected_time:
     ].groupby('datetime_simple')['order_count'].sum().reset_index()
     if len(sub) < 8:
         continue
-    # 주문수가 0인 row 제거
-    sub = sub[sub['order_count'] > 0]
-    # 이동평균 계산
-    sub['ma3'] = sub['order_count'].rolling(window=3, min_periods=1).mean().shift(1)
-    sub['ma7'] = sub['order_count'].rolling(window=7, min_periods=1).mean().shift(1)
-    sub = sub.dropna(subset=['ma3', 'ma7'])
-    # 모델 학습
-    X = sub[['ma3', 'ma7']].values
-    y = sub['order_count'].values
-    model = LinearRegression().fit(X, y)
-    y_pred = model.predict(X)
-    r2 = model.score(X, y)
-    # 다음날 예측 (전날까지의 평균, 0 제외)
-    if len(sub) > 3:
-        ma3 = sub['order_count'].iloc[-3:].mean()
-    else:
-        ma3 = sub['order_count'].mean()
-    if len(sub) > 7:
-        ma7 = sub['order_count'].iloc[-7:].mean()
-    else:
-        ma7 = sub['order_count'].mean()
-    next_pred = model.predict(np.array([[ma3, ma7]]))[0]
+    sub, y, y_pred, r2, coef, intercept, next_pred = fit_forecast(sub)
     next_day = sub['datetime_simple'].max() + pd.Timedelta(days=1)
     fig = go.Figure()
     fig.add_trace(go.Scatter(x=sub['datetime_simple'], y=y, mode='lines+markers', name='실제 주문수'))
@@ -134,7 +130,7 @@ for tp in selected_time:
     ))
     fig.update_layout(title=f"[모든 동+메뉴 합산] {tp} 전체 주문수 예측", xaxis_title="날짜", yaxis_title="주문수")
     st.plotly_chart(fig, use_container_width=True)
-    st.write(f"**회귀식:** 주문수 = {model.coef_[0]:.3f} × 3일이동평균 + {model.coef_[1]:.3f} × 7일이동평균 + {model.intercept_:.3f}")
+    st.write(f"**회귀식:** 주문수 = {coef[0]:.3f} × 3일이동평균 + {coef[1]:.3f} × 7일이동평균 + {intercept:.3f}")
     st.write(f"**설명력(R²):** {r2:.3f}")
     st.info(f"**{next_day.date()} 예측 주문수: {next_pred:.2f}**")
 
@@ -148,31 +144,7 @@ for menu in selected_menu:
         ].groupby('datetime_simple')['order_count'].sum().reset_index()
         if len(sub) < 8:
             continue
-        # 주문수가 0인 row 제거
-        sub = sub[sub['order_count'] > 0]
-
-        # 이동평균 계산
-        sub['ma3'] = sub['order_count'].rolling(window=3, min_periods=1).mean().shift(1)
-        sub['ma7'] = sub['order_count'].rolling(window=7, min_periods=1).mean().shift(1)
-        sub = sub.dropna(subset=['ma3', 'ma7'])
-
-        # 모델 학습
-        X = sub[['ma3', 'ma7']].values
-        y = sub['order_count'].values
-        model = LinearRegression().fit(X, y)
-        y_pred = model.predict(X)
-        r2 = model.score(X, y)
-
-        # 다음날 예측 (전날까지의 평균, 0 제외)
-        if len(sub) > 3:
-            ma3 = sub['order_count'].iloc[-3:].mean()
-        else:
-            ma3 = sub['order_count'].mean()
-        if len(sub) > 7:
-            ma7 = sub['order_count'].iloc[-7:].mean()
-        else:
-            ma7 = sub['order_count'].mean()
-        next_pred = model.predict(np.array([[ma3, ma7]]))[0]
+        sub, y, y_pred, r2, coef, intercept, next_pred = fit_forecast(sub)
 
         fig = go.Figure()
         fig.add_trace(go.Scatter(x=sub['datetime_simple'], y=y, mode='lines+markers', name='실제 주문수'))
@@ -186,6 +158,6 @@ for menu in selected_menu:
         ))
         fig.update_layout(title=f"[모든 동 합산] {menu} - {tp} 주문수 예측", xaxis_title="날짜", yaxis_title="주문수")
         st.plotly_chart(fig, use_container_width=True)
-        st.write(f"**회귀식:** 주문수 = {model.coef_[0]:.3f} × 3일이동평균 + {model.coef_[1]:.3f} × 7일이동평균 + {model.intercept_:.3f}")
+        st.write(f"**회귀식:** 주문수 = {coef[0]:.3f} × 3일이동평균 + {coef[1]:.3f} × 7일이동평균 + {intercept:.3f}")
         st.write(f"**설명력(R²):** {r2:.3f}")
         st.info(f"**{sub['datetime_simple'].max().date() + pd.Timedelta(days=1)} 예측 주문수: {next_pred:.2f}**")
@@ -0,0 +1,154 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import pandas as pd
+import streamlit as st
+
+# 접근 권한 범위
+SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
+
+# secrets에 sheet_sources가 없을 때 사용하는 기본 데이터 소스
+DEFAULT_SOURCES = [
+    {
+        'name': '기본',
+        'spreadsheet_id': '18r37Qff2igl38HkUEVefFtmT1iOpJ-jIg5aQ91wIUII',
+        'range': 'event_raw!A1:Z30000',
+    },
+]
+
+# 동시 요청 수 및 재시도 설정
+MAX_WORKERS = 4
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 1.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+# 시간대 구분 함수
+def get_time_period(hour):
+    if 10 <= hour < 15:
+        return 'lunch'
+    elif 17 <= hour < 22:
+        return 'dinner'
+    else:
+        return 'other'
+
+
+# 데이터 소스 목록 가져오기
+# .streamlit/secrets.toml 예시:
+#   [[sheet_sources]]
+#   name = "서울"
+#   spreadsheet_id = "..."
+#   range = "event_raw!A1:Z30000"
+def get_sources():
+    sources = st.secrets.get('sheet_sources')
+    if not sources:
+        return DEFAULT_SOURCES
+    return [
+        {
+            'name': source.get('name', source['spreadsheet_id']),
+            'spreadsheet_id': source['spreadsheet_id'],
+            'range': source.get('range', DEFAULT_SOURCES[0]['range']),
+        }
+        for source in sources
+    ]
+
+
+# Sheets API discovery 문서 (패키지에 포함된 정적 문서를 한 번만 읽고 파싱해서 재사용)
+# build_from_document가 문서에 추가하는 값은 매번 같으므로 파싱된 dict를 공유해도 안전
+@lru_cache(maxsize=None)
+def get_discovery_document():
+    from googleapiclient.discovery_cache import get_static_doc
+    document = get_static_doc('sheets', 'v4')
+    return json.loads(document) if document is not None else None
+
+
+# Sheets API 클라이언트 생성 (googleapiclient는 사용할 때만 import)
+def build_sheets_service(creds):
+    from googleapiclient.discovery import build, build_from_document
+    document = get_discovery_document()
+    if document is None:
+        return build('sheets', 'v4', credentials=creds)
+    return build_from_document(document, credentials=creds)
+
+
+# 시트 하나 읽기 (실패 시 지수 백오프로 재시도)
+def fetch_sheet_values(creds, source):
+    import httplib2
+    from google.auth.exceptions import RefreshError, TransportError
+    from googleapiclient.errors import HttpError
+
+    # 네트워크/인증 토큰 갱신 중 일시적으로 발생할 수 있는 오류
+    transient_errors = (HttpError, OSError, TransportError, RefreshError, httplib2.HttpLib2Error)
+
+    # API 클라이언트는 스레드 간 공유가 안전하지 않으므로 요청마다 생성
+    service = build_sheets_service(creds)
+    for attempt in range(MAX_RETRIES):
+        try:
+            result = service.spreadsheets().values().get(
+                spreadsheetId=source['spreadsheet_id'], range=source['range']).execute()
+            return result.get('values', [])
+        except transient_errors as e:
+            # 토큰 갱신 오류는 invalid_grant 등 영구 오류일 수 있으므로 retryable인 경우만 재시도
+            if isinstance(e, RefreshError):
+                retryable = e.retryable
+            else:
+                retryable = not isinstance(e, HttpError) or e.resp.status in RETRY_STATUS
+            if not retryable or attempt == MAX_RETRIES - 1:
+                raise
+            time.sleep(BACKOFF_SECONDS * (2 ** attempt))
+
+
+# 모든 소스를 병렬로 읽어 하나의 데이터프레임으로 병합
+# 캐시된 결과를 받는 모든 세션에 경고가 표시되도록 st.warning 대신 (데이터, 오류 메시지 목록)을 반환
+# 모든 소스를 불러오지 못하면 RuntimeError 발생 (실패 결과는 캐시되지 않음)
+def get_google_sheets_data(sources=None):
+    if sources is None:
+        sources = get_sources()
+
+    from google.oauth2 import service_account
+
+    # Streamlit Secrets에서 서비스 계정 정보 가져오기
+    creds = service_account.Credentials.from_service_account_info(
+        st.secrets["gcp_service_account"],
+        scopes=SCOPES
+    )
+
+    # 전체 소요 시간이 가장 느린 시트 하나에 가깝도록 동시에 요청
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(sources))) as executor:
+        futures = [executor.submit(fetch_sheet_values, creds, source) for source in sources]
+
+    frames = []
+    errors = []
+    for source, future in zip(sources, futures):
+        try:
+            values = future.result()
+        except Exception as e:
+            errors.append(f"'{source['name']}' 시트를 불러오지 못했습니다: {str(e)}")
+            continue
+        if not values:
+            errors.append(f"'{source['name']}' 시트에서 데이터를 찾을 수 없습니다.")
+            continue
+        frame = pd.DataFrame(values[1:], columns=values[0])
+        frame['source'] = source['name']
+        frames.append(frame)
+
+    if not frames:
+        raise RuntimeError(' / '.join(['데이터를 찾을 수 없습니다.'] + errors))
+
+    df = pd.concat(frames, ignore_index=True)
+
+    # datetime 컬럼이 있다면 time_period 컬럼 추가
+    if 'datetime' in df.columns:
+        df['datetime'] = pd.to_datetime(df['datetime'])
+        df['time_period'] = df['datetime'].dt.hour.apply(get_time_period)
+        df = df[df['time_period'] != 'other']
+
+    return df, errors
+
+
+# 일부 소스를 불러오지 못한 경우 경고 표시
+def show_load_errors(errors):
+    for error in errors:
+        st.warning(error)